@@ -1,15 +1,26 @@
 import os
 import json
+import importlib.util
 import torch
 import logging
-import time
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import re
+import threading
+from collections import deque
+from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
 from .speech_to_text import SpeechToText
 from .text_to_speech import TextToSpeech
 from .translation import Translator
 from .command_handler import CommandHandler
 from .utils import setup_logging
 
+# Sentence boundaries at which streamed text is flushed to TTS: end
+# punctuation followed by whitespace, so "3.5" or "e.g." stay intact, or a newline
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)|\n")
+
+# Load errors raised by transformers when an attention backend is unsupported
+# by the model or its package is missing
+_ATTN_ERROR_RE = re.compile(r"attention|attn|sdpa", re.IGNORECASE)
+
 class Chatbot:
     """
     Main chatbot class that integrates DialoGPT with speech recognition and synthesis.
@@ -37,6 +48,15 @@ class Chatbot:
         # Initialize components
         self._init_model()
         
+        # Cache values that are fixed after construction and read every turn
+        self._eos_token = self.tokenizer.eos_token
+        self._eos_id = self.tokenizer.eos_token_id
+        self._max_history = self.config["model"]["max_history"]
+        self._max_length = self.config["model"]["max_length"]
+        self._max_kv_tokens = self.config["model"].get("max_kv_tokens", 512)
+        self._kv_sink_tokens = self.config["model"].get("kv_sink_tokens", 4)
+        self._translate_enabled = self.config["language"]["translation_enabled"]
+        
         self.translator = Translator(self.config["language"]["default"])
         self.command_handler = CommandHandler(self.config)
         
@@ -49,8 +69,9 @@ class Chatbot:
         if use_voice_output:
             self.tts = TextToSpeech(self.config)
             
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=self._max_history)
         self.chat_history_ids = None
+        self.past_key_values = None
         
         self.wake_word = self.config["wake_word"].lower()
         self.logger.info(f"Chatbot initialized with wake word: {self.wake_word}")
@@ -61,9 +82,44 @@ class Chatbot:
         
         self.logger.info(f"Loading model: {model_name}")
         
+        # The model is only used for inference
+        torch.set_grad_enabled(False)
+        
+        # Use half precision on GPU; decoding is memory-bandwidth bound, so
+        # fp16/bf16 roughly halves the bytes moved per generated token
+        model_kwargs = {}
+        if torch.cuda.is_available():
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            self.logger.info(f"Loading model weights in {dtype}")
+            model_kwargs = {"torch_dtype": dtype}
+            
+            # Loading straight into the target dtype without a float32 copy
+            # needs the accelerate package
+            if importlib.util.find_spec("accelerate") is not None:
+                model_kwargs["low_cpu_mem_usage"] = True
+        
+        # Prefer fused attention kernels; flash_attention_2 only works with
+        # half precision weights and needs the flash_attn package
+        attn_implementations = ["sdpa", "eager"]
+        if "torch_dtype" in model_kwargs and importlib.util.find_spec("flash_attn") is not None:
+            attn_implementations.insert(0, "flash_attention_2")
+        
         # Check if we need to download the model
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        for attn_implementation in attn_implementations:
+            try:
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    model_name,
+                    attn_implementation=attn_implementation,
+                    **model_kwargs
+                )
+                self.logger.info(f"Using attention implementation: {attn_implementation}")
+                break
+            except (ValueError, ImportError) as e:
+                # Anything else (e.g. a missing dependency) is a real load error
+                if attn_implementation == attn_implementations[-1] or not _ATTN_ERROR_RE.search(str(e)):
+                    raise
+                self.logger.warning(f"Attention implementation '{attn_implementation}' unavailable: {e}")
         
         # Enable model evaluation mode
         self.model.eval()
@@ -72,6 +128,49 @@ class Chatbot:
         if torch.cuda.is_available():
             self.logger.info("CUDA available. Moving model to GPU.")
             self.model = self.model.to('cuda')
+            
+            if self.config["model"].get("compile", False):
+                self._compile_model()
+        
+        # Build the decoding arguments once instead of on every turn. Greedy
+        # decoding is the default since it skips the per-step top-k/top-p
+        # sort and sampling; sampling can be re-enabled in config.json.
+        sampling_config = self.config["model"].get("sampling", {})
+        self.generation_kwargs = {
+            "num_beams": 1,
+            "no_repeat_ngram_size": 3,
+            "do_sample": sampling_config.get("do_sample", False),
+        }
+        if self.generation_kwargs["do_sample"]:
+            self.generation_kwargs.update({
+                "top_k": sampling_config.get("top_k", 10),
+                "top_p": sampling_config.get("top_p", 0.9),
+                "temperature": sampling_config.get("temperature", 0.7),
+            })
+        
+    def _compile_model(self):
+        """
+        Compile the model forward with torch.compile and warm it up.
+        
+        Only the forward is compiled so generate() keeps working on the
+        original module. The default mode is used rather than CUDA graphs,
+        which would record a new graph for every KV cache length. A one-token
+        generate is run here so the first real turn does not pay the compile
+        cost.
+        """
+        self.logger.info("Compiling model forward with torch.compile")
+        try:
+            self.model.forward = torch.compile(self.model.forward, dynamic=True, fullgraph=False)
+            
+            warmup_ids = torch.full((1, 1), self.tokenizer.eos_token_id, dtype=torch.long, device='cuda')
+            self.model.generate(warmup_ids, max_new_tokens=1, pad_token_id=self.tokenizer.eos_token_id)
+        except Exception as e:
+            self.logger.warning(f"torch.compile failed, using eager model: {e}")
+            self._disable_compile()
+            
+    def _disable_compile(self):
+        """Restore the eager forward after a torch.compile failure."""
+        self.model.__dict__.pop("forward", None)
         
     def process_input(self, user_input, input_language=None):
         """Process text input and generate a response."""
@@ -80,80 +179,248 @@ class Chatbot:
         if command_response:
             return command_response
         
+        detected_language, bot_input_ids = self._prepare_input(user_input, input_language)
+        
+        # Generate response
+        outputs = self._generate(bot_input_ids)
+        
+        # Decode only the newly generated tokens
+        prompt_len = bot_input_ids.shape[-1]
+        new_token_ids = outputs.sequences[0, prompt_len:]
+        response = self.tokenizer.decode(new_token_ids, skip_special_tokens=True)
+        
+        return self._translate_response(response, detected_language)
+    
+    def process_input_stream(self, user_input, input_language=None):
+        """
+        Process text input and yield the response one sentence at a time.
+        
+        Generation runs on a background thread and each sentence is yielded
+        as soon as it is complete, so it can be spoken while the rest of the
+        response is still being generated.
+        """
+        # Check if this is a command
+        command_response = self.command_handler.handle_command(user_input)
+        if command_response:
+            yield command_response
+            return
+        
+        detected_language, bot_input_ids = self._prepare_input(user_input, input_language)
+        
+        buffer = ""
+        for new_text in self._stream_generate(bot_input_ids):
+            buffer += new_text
+            
+            # Flush every complete sentence in the buffer
+            match = _SENTENCE_END_RE.search(buffer)
+            while match:
+                sentence, buffer = buffer[:match.end()].strip(), buffer[match.end():]
+                if sentence:
+                    yield self._translate_response(sentence, detected_language)
+                match = _SENTENCE_END_RE.search(buffer)
+        
+        buffer = buffer.strip()
+        if buffer:
+            yield self._translate_response(buffer, detected_language)
+    
+    def _prepare_input(self, user_input, input_language=None):
+        """
+        Translate and encode user input for the model.
+        
+        Returns:
+            tuple: (detected_language, bot_input_ids)
+        """
         # Handle translation if needed
         detected_language = input_language
         translated_input = user_input
         
-        if self.config["language"]["translation_enabled"] and not input_language:
-            detected_language, translated_input = self.translator.translate_to_english(user_input)
+        if self._translate_enabled:
+            if not input_language:
+                # Language detection is local; English input never reaches
+                # the translation service
+                detected_language, translated_input = self.translator.translate_to_english(user_input)
+            elif input_language != "en":
+                translated_input = self.translator.translate(user_input, source_lang=input_language,
+                                                             target_lang="en")
         
-        # Add to conversation history
+        # Add to conversation history; the deque drops the oldest entry itself
         self.conversation_history.append(translated_input)
-        if len(self.conversation_history) > self.config["model"]["max_history"]:
-            self.conversation_history = self.conversation_history[-self.config["model"]["max_history"]:]
         
         # Encode the input
-        new_user_input_ids = self.tokenizer.encode(translated_input + self.tokenizer.eos_token, 
-                                                  return_tensors='pt')
+        new_user_input_ids = self.tokenizer.encode(translated_input + self._eos_token,
+                                                   return_tensors='pt')
         
-        # Move input to GPU if available
+        # Move input to GPU if available. Copying from pinned memory lets the
+        # transfer run asynchronously; generate() is issued on the same
+        # stream, so it is ordered after the copy.
         if torch.cuda.is_available():
-            new_user_input_ids = new_user_input_ids.to('cuda')
+            new_user_input_ids = new_user_input_ids.pin_memory().to('cuda', non_blocking=True)
         
-        # Append to chat history
+        # Append to chat history. The full id sequence is still passed so that
+        # positions and the attention mask stay correct, but only the tokens
+        # not yet in past_key_values are run through the model.
         bot_input_ids = new_user_input_ids
         if self.chat_history_ids is not None:
             bot_input_ids = torch.cat([self.chat_history_ids, new_user_input_ids], dim=-1)
         
-        # Generate response
-        self.chat_history_ids = self.model.generate(
-            bot_input_ids,
-            max_length=self.config["model"]["max_length"] + len(bot_input_ids[0]),
-            pad_token_id=self.tokenizer.eos_token_id,
-            no_repeat_ngram_size=3,
-            do_sample=True,
-            top_k=50,
-            top_p=0.9,
-            temperature=0.7
-        )
+        return detected_language, bot_input_ids
+    
+    def _stream_generate(self, bot_input_ids):
+        """
+        Run generation on a background thread and yield text as it is decoded.
         
-        # Decode response
-        response = self.tokenizer.decode(self.chat_history_ids[:, bot_input_ids.shape[-1]:][0], 
-                                        skip_special_tokens=True)
+        If the compiled model fails before any text was produced, the turn is
+        retried in eager mode with a fresh streamer; a streamer that already
+        received the prompt would replay it as output.
+        """
+        while True:
+            streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+            errors = []
+            
+            def _run():
+                try:
+                    self._generate(bot_input_ids, streamer=streamer)
+                except Exception as e:
+                    errors.append(e)
+                    streamer.end()
+            
+            thread = threading.Thread(target=_run, daemon=True)
+            thread.start()
+            
+            received = False
+            for new_text in streamer:
+                received = received or bool(new_text)
+                yield new_text
+            
+            thread.join()
+            if not errors:
+                return
+            if received or "forward" not in self.model.__dict__:
+                raise errors[0]
+            
+            self.logger.warning(f"Compiled model failed, falling back to eager mode: {errors[0]}")
+            self._disable_compile()
+            self.past_key_values = None
+    
+    @torch.inference_mode()
+    def _generate(self, bot_input_ids, streamer=None):
+        """Generate a response, reusing the KV cache from previous turns."""
+        try:
+            outputs = self._call_generate(bot_input_ids, streamer)
+        except Exception as e:
+            # A compiled forward can still fail on shapes not seen during
+            # warm-up; retry this turn in eager mode instead of ending the chat.
+            # Streaming callers retry themselves with a fresh streamer.
+            if streamer is not None or "forward" not in self.model.__dict__:
+                raise
+            self.logger.warning(f"Compiled model failed, falling back to eager mode: {e}")
+            self._disable_compile()
+            
+            # The failed call may have partly updated the cache, so rebuild it
+            # from the full id sequence
+            self.past_key_values = None
+            outputs = self._call_generate(bot_input_ids, streamer)
+            
+        self.chat_history_ids = outputs.sequences
+        self.past_key_values = outputs.past_key_values
+        self._truncate_kv_cache()
         
-        # Translate back if needed
-        if self.config["language"]["translation_enabled"] and detected_language != "en":
+        return outputs
+    
+    def _call_generate(self, bot_input_ids, streamer=None):
+        """Run model.generate() on the ids with the current KV cache."""
+        return self.model.generate(
+            bot_input_ids,
+            past_key_values=self.past_key_values,
+            use_cache=True,
+            return_dict_in_generate=True,
+            max_new_tokens=self._max_length,
+            pad_token_id=self._eos_id,
+            streamer=streamer,
+            **self.generation_kwargs
+        )
+    
+    def _translate_response(self, response, detected_language):
+        """Translate a response back to the user's language if needed."""
+        if self._translate_enabled and detected_language != "en":
             response = self.translator.translate_from_english(response, detected_language)
             
         return response
     
+    def _truncate_kv_cache(self):
+        """
+        Keep the KV cache within the configured window.
+        
+        The first few "sink" tokens are always kept (as in StreamingLLM) and
+        the rest of the window is filled with the most recent tokens. The same
+        positions are dropped from chat_history_ids so the ids and the cache
+        stay aligned.
+        """
+        if self.past_key_values is None:
+            return
+        
+        max_kv_tokens = self._max_kv_tokens
+        num_sinks = self._kv_sink_tokens
+        
+        legacy_cache = self.past_key_values
+        if hasattr(legacy_cache, "to_legacy_cache"):
+            legacy_cache = legacy_cache.to_legacy_cache()
+        
+        cache_len = legacy_cache[0][0].shape[-2]
+        overflow = cache_len - max_kv_tokens
+        if overflow <= 0:
+            return
+        
+        num_sinks = min(num_sinks, max_kv_tokens)
+        
+        def _evict(tensor, dim):
+            head = tensor.narrow(dim, 0, num_sinks)
+            tail = tensor.narrow(dim, num_sinks + overflow, tensor.shape[dim] - num_sinks - overflow)
+            return torch.cat([head, tail], dim=dim)
+        
+        legacy_cache = tuple((_evict(k, -2), _evict(v, -2)) for k, v in legacy_cache)
+        
+        if hasattr(self.past_key_values, "from_legacy_cache"):
+            self.past_key_values = type(self.past_key_values).from_legacy_cache(legacy_cache)
+        else:
+            self.past_key_values = legacy_cache
+        
+        self.chat_history_ids = _evict(self.chat_history_ids, -1)
+        self.logger.debug(f"Evicted {overflow} tokens from the KV cache")
+        
     def listen(self):
         """Listen for wake word and then for a command."""
         if not self.use_voice_input:
             return input("You: ")
         
-        # Listen for wake word
         while True:
-            wake_word_detected = self.stt.listen_for_wake_word(self.wake_word)
-            if wake_word_detected:
-                self.logger.info("Wake word detected. Listening for command...")
-                if self.use_voice_output:
-                    self.tts.speak("I'm listening")
-                
-                # Listen for command
-                user_input, language = self.stt.listen_and_transcribe()
-                if user_input:
-                    return user_input, language
+            # Block until the wake word is heard
+            self.stt.wait_for_wake_word(self.wake_word)
+            self.logger.info("Wake word detected. Listening for command...")
+            if self.use_voice_output:
+                # Finish speaking before the microphone starts listening
+                self.tts.speak("I'm listening", wait=True)
             
-            # Sleep briefly to reduce CPU usage
-            time.sleep(0.1)
+            # Listen for command
+            user_input, language = self.stt.listen_and_transcribe()
+            if user_input:
+                return user_input, language
     
-    def speak(self, text):
+    def speak(self, text, wait=False):
         """Convert text to speech if voice output is enabled."""
         if self.use_voice_output:
-            self.tts.speak(text)
+            self.tts.speak(text, wait=wait)
         print(f"Bot: {text}")
             
+    def speak_stream(self, chunks):
+        """Speak each chunk of a streamed response as soon as it arrives."""
+        print("Bot:", end="", flush=True)
+        for chunk in chunks:
+            print(f" {chunk}", end="", flush=True)
+            if self.use_voice_output:
+                self.tts.speak(chunk)
+        print()
+            
     def start(self):
         """Start the conversation loop."""
         print(f"Chatbot initialized. Say '{self.wake_word}' to start talking.")
@@ -169,21 +436,21 @@ class Chatbot:
                     detected_language = None
                 
                 # Check for exit command
-                if user_input.lower() in self.config["commands"]["exit_commands"]:
-                    self.speak("Goodbye!")
+                if user_input.lower() in self.command_handler.exit_commands_set:
+                    self.speak("Goodbye!", wait=True)
                     break
                 
-                # Process input and get response
-                response = self.process_input(user_input, detected_language)
-                
-                # Speak the response
-                self.speak(response)
+                # Process input and speak the response as it is generated
+                self.speak_stream(self.process_input_stream(user_input, detected_language))
                 
         except KeyboardInterrupt:
             print("\nExiting chatbot...")
         except Exception as e:
             self.logger.error(f"Error in chatbot: {e}", exc_info=True)
             print(f"An error occurred: {e}")
+        finally:
+            if self.use_voice_input:
+                self.stt.close()
         
         print("Chatbot terminated.")
 
@@ -4,6 +4,15 @@ import re
 import random
 from .utils import setup_logging
 
+# Extracts the location from weather commands, e.g. "weather in Paris?"
+_WEATHER_LOCATION_RE = re.compile(r"(?:in|at|for)\s+([a-zA-Z\s]+)(?:\?)?$", re.IGNORECASE)
+
+# Placeholder weather conditions (would be replaced with actual API call)
+_WEATHER_CONDITIONS = (
+    "sunny", "partly cloudy", "cloudy", "rainy", "stormy",
+    "windy", "snowy", "foggy", "humid", "clear"
+)
+
 class CommandHandler:
     """
     Handles built-in and custom commands for the chatbot.
@@ -28,6 +37,7 @@ class CommandHandler:
             
         # Extract command patterns
         self.exit_commands = self.commands_config["exit_commands"]
+        self.exit_commands_set = frozenset(command.lower() for command in self.exit_commands)
         self.custom_commands = self.commands_config["custom_commands"]
         
         # Initialize builtin commands handlers
@@ -37,6 +47,7 @@ class CommandHandler:
             "weather": self._handle_weather_command,
             "help": self._handle_help_command,
         }
+        self._compile_command_patterns()
         
         self.logger.info("Command handler initialized")
         
@@ -53,26 +64,39 @@ class CommandHandler:
         if not user_input:
             return None
             
+        lowercase_input = user_input.lower()
+        
         # Check if it's an exit command
-        if user_input.lower() in self.exit_commands:
+        if lowercase_input in self.exit_commands_set:
             return "Goodbye!"
             
-        # Check custom commands
-        lowercase_input = user_input.lower()
-        
-        for command_type, patterns in self.custom_commands.items():
-            for pattern in patterns:
-                if pattern.lower() in lowercase_input:
-                    # Found a matching command
-                    self.logger.info(f"Detected command: {command_type}")
-                    
-                    # Check if we have a handler for this command type
-                    if command_type in self.builtin_handlers:
-                        return self.builtin_handlers[command_type](user_input)
-                        
+        # Check custom commands, in configuration order
+        for command_type, command_re in self._command_patterns:
+            if command_re.search(lowercase_input):
+                # Found a matching command
+                self.logger.info(f"Detected command: {command_type}")
+                return self.builtin_handlers[command_type](user_input)
+                
         # No command matched
         return None
         
+    def _compile_command_patterns(self):
+        """
+        Compile the patterns of each handled command type into one regex.
+        
+        Types without a handler are skipped, since they can never produce a
+        response, and the list keeps configuration order so that the first
+        configured type wins when several match.
+        """
+        self._command_patterns = []
+        
+        for command_type, patterns in self.custom_commands.items():
+            if command_type not in self.builtin_handlers:
+                continue
+            alternatives = [re.escape(pattern.lower()) for pattern in patterns if pattern]
+            if alternatives:
+                self._command_patterns.append((command_type, re.compile("|".join(alternatives))))
+        
     def _handle_time_command(self, command):
         """Handle time-related commands."""
         current_time = datetime.datetime.now().strftime("%I:%M %p")
@@ -91,7 +115,7 @@ class CommandHandler:
         call a weather API to get actual weather data.
         """
         # Extract location from command using regex
-        location_match = re.search(r"(?:in|at|for)\s+([a-zA-Z\s]+)(?:\?)?$", command)
+        location_match = _WEATHER_LOCATION_RE.search(command)
         
         if location_match:
             location = location_match.group(1).strip()
@@ -99,15 +123,8 @@ class CommandHandler:
             location = "your location"
             
         # Placeholder responses (would be replaced with actual API call)
-        weather_conditions = [
-            "sunny", "partly cloudy", "cloudy", "rainy", "stormy",
-            "windy", "snowy", "foggy", "humid", "clear"
-        ]
-        
-        temperatures = list(range(0, 40))  # 0 to 39 degrees
-        
-        condition = random.choice(weather_conditions)
-        temperature = random.choice(temperatures)
+        condition = random.choice(_WEATHER_CONDITIONS)
+        temperature = random.randint(0, 39)  # 0 to 39 degrees
         
         return f"The weather in {location} is currently {condition} with a temperature of {temperature}°C. " \
                f"Note: This is a placeholder response. To implement actual weather data, " \
@@ -147,5 +164,6 @@ class CommandHandler:
             return False
             
         self.builtin_handlers[command_type] = handler_function
+        self._compile_command_patterns()
         self.logger.info(f"Added custom handler for command type: {command_type}")
         return True
\ No newline at end of file
@@ -1,8 +1,16 @@
 import speech_recognition as sr
+import numpy as np
 import logging
+import struct
+import threading
 import time
-from langdetect import detect
-from .utils import setup_logging
+from langdetect import detect, LangDetectException
+from .utils import setup_logging, extract_wake_word, WakeWordMatcher
+
+# Whisper language codes that differ from the googletrans/langdetect codes
+# used by the rest of the app, and the reverse mapping
+_WHISPER_TO_APP_LANGUAGE = {"zh": "zh-cn", "yue": "zh-tw", "nn": "no"}
+_APP_TO_WHISPER_LANGUAGE = {"zh-cn": "zh", "zh-tw": "zh"}
 
 class SpeechToText:
     """
@@ -26,6 +34,11 @@ class SpeechToText:
         self.recognizer.pause_threshold = speech_config["pause_threshold"]
         self.timeout = speech_config["timeout"]
         
+        # Matcher for the configured wake word, built once and reused by
+        # every transcript check
+        self._wake_matcher = WakeWordMatcher(config["wake_word"])
+        self._wake_word_folded = config["wake_word"].casefold()
+        
         # Setup language
         self.default_language = config["language"]["default"]
         self.auto_detect_language = config["language"]["auto_detect"]
@@ -40,6 +53,26 @@ class SpeechToText:
             
         # Check microphone availability
         self._check_mic_availability()
+        
+        # Open the microphone once and calibrate for ambient noise. The
+        # calibration is refreshed every recalibration_interval seconds
+        # instead of on every listen call.
+        self.recalibration_interval = speech_config.get("recalibration_interval", 300)
+        self._mic = sr.Microphone(device_index=self.device_index)
+        self._mic_source = self._mic.__enter__()
+        self._last_calibration = None
+        self._maybe_recalibrate()
+        
+        # Setup local speech recognition
+        self.asr = None
+        if speech_config.get("asr_engine", "google") == "whisper":
+            self._init_whisper(speech_config.get("whisper_model", "tiny"),
+                               speech_config.get("whisper_compute_type", "int8"))
+        
+        # Setup on-device wake word detection
+        self.wake_engine = None
+        if speech_config.get("wake_word_engine", "google") == "porcupine":
+            self._init_porcupine(config["wake_word"], speech_config.get("porcupine_access_key", ""))
             
     def _check_mic_availability(self):
         """Check and print available microphones."""
@@ -56,45 +89,250 @@ class SpeechToText:
                 self.logger.warning(f"Specified microphone index {self.device_index} out of range. Using default.")
                 self.device_index = None
     
-    def listen_for_wake_word(self, wake_word):
+    def _maybe_recalibrate(self):
+        """Recalibrate the energy threshold if the last calibration is stale."""
+        now = time.monotonic()
+        if self._last_calibration is not None and now - self._last_calibration < self.recalibration_interval:
+            return
+            
+        self.logger.debug("Calibrating for ambient noise...")
+        self.recognizer.adjust_for_ambient_noise(self._mic_source, duration=1.0)
+        self._last_calibration = now
+        
+    def _init_whisper(self, model_size, compute_type):
+        """Initialize the faster-whisper local speech recognition model if available."""
+        self.logger.info(f"Initializing faster-whisper ASR model: {model_size} ({compute_type})")
+        
+        try:
+            from faster_whisper import WhisperModel
+            
+            self.asr = WhisperModel(model_size, compute_type=compute_type)
+            
+            # Language to force when auto-detection is off, in Whisper's codes
+            self._whisper_language = None
+            if not self.auto_detect_language:
+                language = _APP_TO_WHISPER_LANGUAGE.get(self.default_language, self.default_language)
+                supported = getattr(self.asr, "supported_languages", None)
+                if supported is None or language in supported:
+                    self._whisper_language = language
+                else:
+                    self.logger.warning(f"Whisper does not support language '{self.default_language}'. "
+                                        "Detecting the spoken language instead.")
+                    
+            self.logger.info("faster-whisper ASR model initialized successfully")
+            
+        except ImportError:
+            self.logger.warning("faster-whisper not installed. Falling back to Google Speech Recognition.")
+        except Exception as e:
+            self.logger.error(f"Error initializing faster-whisper: {e}")
+        
+    def _init_porcupine(self, wake_word, access_key):
+        """Initialize the Porcupine on-device wake word engine if available."""
+        if not access_key:
+            self.logger.warning("No Porcupine access key configured. Falling back to Google wake word detection.")
+            return
+            
+        self.logger.info("Initializing Porcupine wake word engine")
+        
+        try:
+            import pvporcupine
+            import pyaudio
+            
+            self.wake_engine = pvporcupine.create(access_key=access_key, keywords=[wake_word.lower()])
+            
+            self._audio = pyaudio.PyAudio()
+            self._wake_stream = self._audio.open(
+                rate=self.wake_engine.sample_rate,
+                channels=1,
+                format=pyaudio.paInt16,
+                input=True,
+                frames_per_buffer=self.wake_engine.frame_length,
+                input_device_index=self.device_index
+            )
+            
+            # Run detection continuously on a background thread; detections
+            # are signalled through _wake_event
+            self._wake_event = threading.Event()
+            self._wake_stop = threading.Event()
+            self._wake_thread = threading.Thread(target=self._wake_loop, daemon=True)
+            self._wake_thread.start()
+            
+            self.logger.info("Porcupine wake word engine initialized successfully")
+            return
+            
+        except ImportError:
+            self.logger.warning("pvporcupine not installed. Falling back to Google wake word detection.")
+        except Exception as e:
+            self.logger.error(f"Error initializing Porcupine: {e}")
+            
+        # Fallback to Google Speech Recognition
+        self._close_wake_engine()
+        
+    def close(self):
+        """Release the microphone and the wake word engine."""
+        if self._mic_source is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic_source = None
+            
+        self._close_wake_engine()
+        
+    def _close_wake_engine(self):
+        """Release the wake word engine and its audio stream."""
+        if getattr(self, "_wake_thread", None) is not None:
+            self._wake_stop.set()
+            self._wake_thread.join()
+            self._wake_thread = None
+            
+        if getattr(self, "_wake_stream", None) is not None:
+            self._wake_stream.close()
+            self._wake_stream = None
+            
+        if getattr(self, "_audio", None) is not None:
+            self._audio.terminate()
+            self._audio = None
+            
+        if self.wake_engine is not None:
+            self.wake_engine.delete()
+            self.wake_engine = None
+    
+    def _wake_loop(self):
+        """Feed microphone frames to Porcupine until the engine is closed."""
+        frame_length = self.wake_engine.frame_length
+        
+        while not self._wake_stop.is_set():
+            try:
+                pcm = self._wake_stream.read(frame_length, exception_on_overflow=False)
+                pcm = struct.unpack_from("h" * frame_length, pcm)
+                
+                if self.wake_engine.process(pcm) >= 0:
+                    self._wake_event.set()
+                    
+            except Exception as e:
+                self.logger.error(f"Error in wake word detection, falling back to Google: {e}")
+                self._wake_stop.set()
+                return
+    
+    def wait_for_wake_word(self, wake_word):
+        """
+        Block until the wake word is detected.
+        
+        Args:
+            wake_word: The wake word to listen for, e.g. "jarvis"
+        """
+        if self.wake_engine is not None:
+            # Discard detections that happened while we were not waiting,
+            # e.g. the wake word spoken as part of the previous command
+            self._wake_event.clear()
+            while not self._wake_stop.is_set():
+                if self._wake_event.wait(1.0):
+                    self.logger.info(f"Wake word '{wake_word}' detected")
+                    return
+                    
+        while not self._listen_for_wake_word_google(wake_word):
+            pass
+    
+    def listen_for_wake_word(self, wake_word, timeout=3):
         """
         Listen for the wake word. 
         
         Args:
             wake_word: The wake word to listen for, e.g. "jarvis"
+            timeout: Seconds to wait for a detection when using Porcupine
             
         Returns:
             bool: True if wake word detected, False otherwise
         """
-        with sr.Microphone(device_index=self.device_index) as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        if self.wake_engine is not None and not self._wake_stop.is_set():
+            detected = self._wake_event.wait(timeout)
+            self._wake_event.clear()
+            if detected:
+                self.logger.info(f"Wake word '{wake_word}' detected")
+            return detected
+            
+        return self._listen_for_wake_word_google(wake_word)
+        
+    def _listen_for_wake_word_google(self, wake_word):
+        """Detect the wake word by transcribing a short snippet with Google."""
+        self._maybe_recalibrate()
+        source = self._mic_source
+        
+        try:
+            self.logger.debug("Listening for wake word...")
+            audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=3)
             
             try:
-                self.logger.debug("Listening for wake word...")
-                audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=3)
+                # Use Google's speech recognition service
+                text = self.recognizer.recognize_google(audio)
+                self.logger.debug(f"Heard: {text}")
                 
-                try:
-                    # Use Google's speech recognition service
-                    text = self.recognizer.recognize_google(audio).lower()
-                    self.logger.debug(f"Heard: {text}")
+                # Check if wake word is in the recognized text; the matcher
+                # casefolds the transcript itself
+                if wake_word.casefold() == self._wake_word_folded:
+                    wake_word_matcher = self._wake_matcher
+                else:
+                    wake_word_matcher = wake_word
+                if extract_wake_word(text, wake_word_matcher):
+                    self.logger.info(f"Wake word '{wake_word}' detected")
+                    return True
                     
-                    # Check if wake word is in the recognized text
-                    if wake_word.lower() in text.lower():
-                        self.logger.info(f"Wake word '{wake_word}' detected")
-                        return True
-                        
-                except sr.UnknownValueError:
-                    # Speech wasn't understood
-                    pass
-                except sr.RequestError as e:
-                    self.logger.error(f"Could not request results; {e}")
-                    
-            except sr.WaitTimeoutError:
-                # Timeout occurred
+            except sr.UnknownValueError:
+                # Speech wasn't understood
                 pass
+            except sr.RequestError as e:
+                self.logger.error(f"Could not request results; {e}")
                 
+        except sr.WaitTimeoutError:
+            # Timeout occurred
+            pass
+            
         return False
     
+    def _transcribe_google(self, audio):
+        """
+        Transcribe audio with Google Speech Recognition.
+        
+        Returns:
+            tuple: (transcribed_text, language)
+        """
+        language = self.default_language
+        text = self.recognizer.recognize_google(audio, language=language)
+        
+        # Detect the language from the transcript instead of re-recognizing
+        # the same audio; translating text is much cheaper than a second
+        # recognition request
+        if self.auto_detect_language:
+            try:
+                language = detect(text)
+            except LangDetectException:
+                pass
+            
+        return text, language
+        
+    def _transcribe_whisper(self, audio):
+        """
+        Transcribe audio locally with faster-whisper.
+        
+        Whisper detects the spoken language itself, so auto-detection does
+        not need a second pass.
+        
+        Returns:
+            tuple: (transcribed_text, language)
+        """
+        raw_data = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+        
+        segments, info = self.asr.transcribe(samples, language=self._whisper_language,
+                                             vad_filter=True, beam_size=1)
+        
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+            
+        # A forced language is reported as configured (e.g. "zh-tw", not "zh")
+        if self._whisper_language is not None:
+            return text, self.default_language
+        return text, _WHISPER_TO_APP_LANGUAGE.get(info.language, info.language)
+    
     def listen_and_transcribe(self):
         """
         Listen for speech and convert to text.
@@ -102,57 +340,36 @@ class SpeechToText:
         Returns:
             tuple: (transcribed_text, detected_language)
         """
-        with sr.Microphone(device_index=self.device_index) as source:
-            self.logger.info("Listening...")
-            
-            # Adjust for ambient noise
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        self._maybe_recalibrate()
+        source = self._mic_source
+        
+        self.logger.info("Listening...")
+        
+        try:
+            audio = self.recognizer.listen(source, timeout=self.timeout, phrase_time_limit=10)
+            self.logger.info("Audio captured, transcribing...")
             
             try:
-                audio = self.recognizer.listen(source, timeout=self.timeout, phrase_time_limit=10)
-                self.logger.info("Audio captured, transcribing...")
+                if self.asr is not None:
+                    text, language = self._transcribe_whisper(audio)
+                else:
+                    text, language = self._transcribe_google(audio)
                 
-                # Try different recognition services
-                try:
-                    # Try to auto-detect language if configured
-                    language = self.default_language
-                    
-                    if self.auto_detect_language:
-                        # First try to recognize with default language
-                        try:
-                            text = self.recognizer.recognize_google(audio, language=language)
-                            
-                            # Try to detect language from text
-                            detected_lang = detect(text)
-                            
-                            # If detected language differs from default, re-recognize with detected language
-                            if detected_lang != language:
-                                language = detected_lang
-                                text = self.recognizer.recognize_google(audio, language=language)
-                                
-                        except Exception:
-                            # If failed with default language, try with English
-                            text = self.recognizer.recognize_google(audio, language='en')
-                            language = 'en'
-                    else:
-                        # Use default language
-                        text = self.recognizer.recognize_google(audio, language=language)
-                    
-                    self.logger.info(f"Transcribed: '{text}' (Language: {language})")
-                    return text, language
-                    
-                except sr.UnknownValueError:
-                    self.logger.warning("Speech Recognition could not understand audio")
-                    return None, None
-                    
-                except sr.RequestError as e:
-                    self.logger.error(f"Could not request results; {e}")
-                    return None, None
-                    
-            except sr.WaitTimeoutError:
-                self.logger.warning("No speech detected within timeout period")
+                self.logger.info(f"Transcribed: '{text}' (Language: {language})")
+                return text, language
+                
+            except sr.UnknownValueError:
+                self.logger.warning("Speech Recognition could not understand audio")
                 return None, None
                 
-            except Exception as e:
-                self.logger.error(f"Error in speech recognition: {e}", exc_info=True)
-                return None, None
\ No newline at end of file
+            except sr.RequestError as e:
+                self.logger.error(f"Could not request results; {e}")
+                return None, None
+                
+        except sr.WaitTimeoutError:
+            self.logger.warning("No speech detected within timeout period")
+            return None, None
+            
+        except Exception as e:
+            self.logger.error(f"Error in speech recognition: {e}", exc_info=True)
+            return None, None
\ No newline at end of file
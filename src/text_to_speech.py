@@ -1,14 +1,67 @@
 import pyttsx3
 import logging
-import os
 import platform
+import queue
+import threading
+from collections import OrderedDict
 from .utils import setup_logging
 
+# Riva voice and the sample rate of the 16-bit mono PCM requested from it
+RIVA_LANGUAGE_CODE = "en-US"
+RIVA_VOICE_NAME = "English-US-Female-1"
+RIVA_SAMPLE_RATE = 44100
+
+# Substring of the preferred pyttsx3 voice name for each platform.system()
+_PREFERRED_VOICES = {
+    "Windows": "female",
+    "Darwin": "samantha",
+}
+
+# Keepalive and HTTP/2 settings that keep an idle Riva connection warm
+RIVA_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 20000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.max_receive_message_length', 16 << 20),
+]
+
+# gRPC channels to Riva servers, keyed by (server URL, use_ssl)
+_RIVA_CHANNELS = {}
+
+def _get_riva_channel(server_url, use_ssl=False):
+    """
+    Get a shared gRPC channel to a Riva server, creating it on first use.
+    
+    Args:
+        server_url: Riva server address (host:port)
+        use_ssl: Whether to open a TLS channel
+        
+    Returns:
+        grpc.Channel: Channel to the server
+    """
+    key = (server_url, use_ssl)
+    channel = _RIVA_CHANNELS.get(key)
+    if channel is None:
+        import grpc
+        
+        if use_ssl:
+            channel = grpc.secure_channel(server_url, grpc.ssl_channel_credentials(),
+                                          options=RIVA_CHANNEL_OPTIONS)
+        else:
+            channel = grpc.insecure_channel(server_url, options=RIVA_CHANNEL_OPTIONS)
+        _RIVA_CHANNELS[key] = channel
+    return channel
+
 class TextToSpeech:
     """
     Handles text-to-speech functionality with support for different engines.
     Supports pyttsx3 by default, with optional NVIDIA Riva integration.
     """
+    # Installed pyttsx3 voices as (id, name, casefolded name), enumerated once
+    # per process since querying the driver can be slow
+    _voices_cache = None
+    
     def __init__(self, config):
         """
         Initialize the text-to-speech engine.
@@ -37,13 +90,59 @@ class TextToSpeech:
         elif self.engine_type == "riva" and config["speech"]["riva"]["enabled"]:
             self._init_riva()
         else:
-            self.logger.warning(f"Unknown TTS engine: {self.engine_type}. Falling back to pyttsx3.")
+            self.logger.warning("Unknown TTS engine: %s. Falling back to pyttsx3.", self.engine_type)
             self.engine_type = "pyttsx3"
             self._init_pyttsx3()
             
     def _init_pyttsx3(self):
-        """Initialize the pyttsx3 engine."""
+        """
+        Initialize the pyttsx3 engine on a dedicated worker thread.
+        
+        pyttsx3 drivers are not thread-safe and some (e.g. SAPI5) must be
+        used from the thread that created them, so the worker owns the
+        engine and speak() only enqueues text for it.
+        """
         self.logger.info("Initializing pyttsx3 TTS engine")
+        
+        self._tts_queue = queue.Queue()
+        self._tts_init_error = None
+        ready = threading.Event()
+        
+        self._tts_thread = threading.Thread(target=self._tts_loop, args=(ready,), daemon=True)
+        self._tts_thread.start()
+        ready.wait()
+        
+        if self._tts_init_error is not None:
+            raise self._tts_init_error
+            
+        # Speak an empty utterance in the background so the driver's first-use
+        # cost (voice and audio device loading) is paid before the first reply
+        if self.speech_config.get("warmup", True):
+            self._tts_queue.put(("", None))
+            
+    def _tts_loop(self, ready):
+        """Create the pyttsx3 engine, then speak queued text until the process exits."""
+        try:
+            self._setup_pyttsx3_engine()
+        except Exception as e:
+            self._tts_init_error = e
+            return
+        finally:
+            ready.set()
+            
+        while True:
+            text, done = self._tts_queue.get()
+            try:
+                self.engine.say(text)
+                self.engine.runAndWait()
+            except Exception as e:
+                self.logger.error("Error in pyttsx3 TTS: %s", e)
+            finally:
+                if done is not None:
+                    done.set()
+                    
+    def _setup_pyttsx3_engine(self):
+        """Create and configure the pyttsx3 engine."""
         self.engine = pyttsx3.init()
         
         # Configure voice properties
@@ -61,37 +160,37 @@ class TextToSpeech:
     def _set_default_voice(self):
         """Set a default voice based on the system."""
         try:
-            voices = self.engine.getProperty('voices')
+            if TextToSpeech._voices_cache is None:
+                TextToSpeech._voices_cache = [
+                    (voice.id, voice.name, voice.name.casefold())
+                    for voice in self.engine.getProperty('voices')
+                ]
+            voices = TextToSpeech._voices_cache
             
             if len(voices) == 0:
                 self.logger.warning("No voices found for pyttsx3")
                 return
                 
-            # Get system information
-            system = platform.system()
-            
-            if system == "Windows":
-                # On Windows, try to find a female voice (usually better quality)
-                for voice in voices:
-                    if "female" in voice.name.lower():
-                        self.engine.setProperty('voice', voice.id)
-                        self.logger.info(f"Selected voice: {voice.name}")
-                        return
-                        
-            elif system == "Darwin":  # macOS
-                # On macOS, try to find a high-quality voice
-                for voice in voices:
-                    if "samantha" in voice.name.lower():
-                        self.engine.setProperty('voice', voice.id)
-                        self.logger.info(f"Selected voice: {voice.name}")
-                        return
-                        
+            # Prefer a known good voice for the system: a female voice on
+            # Windows (usually better quality), Samantha on macOS
+            preferred = _PREFERRED_VOICES.get(platform.system())
+            hit = None
+            if preferred:
+                hit = next((voice for voice in voices if preferred in voice[2]), None)
+                
+            if hit is not None:
+                voice_id, name, _ = hit
+                self.engine.setProperty('voice', voice_id)
+                self.logger.info("Selected voice: %s", name)
+                return
+                
             # Fallback to the first available voice
-            self.engine.setProperty('voice', voices[0].id)
-            self.logger.info(f"Selected default voice: {voices[0].name}")
+            voice_id, name, _ = voices[0]
+            self.engine.setProperty('voice', voice_id)
+            self.logger.info("Selected default voice: %s", name)
             
         except Exception as e:
-            self.logger.error(f"Error setting default voice: {e}")
+            self.logger.error("Error setting default voice: %s", e)
             
     def _init_riva(self):
         """Initialize NVIDIA Riva TTS engine if available."""
@@ -106,6 +205,9 @@ class TextToSpeech:
                 import nvidia.riva.client
                 from nvidia.riva.client import SpeechSynthesisClient
                 
+                # Playback backend, loaded once here rather than per utterance
+                import sounddevice as sd
+                
                 # Initialize Riva client
                 riva_config = self.config["speech"]["riva"]
                 auth = None
@@ -113,18 +215,37 @@ class TextToSpeech:
                 if riva_config["auth_key"]:
                     auth = nvidia.riva.client.Auth(api_key=riva_config["auth_key"])
                     
+                # Share one warm channel per server across engine switches
+                channel = _get_riva_channel(
+                    riva_config["server_url"],
+                    riva_config.get("use_ssl", bool(riva_config["auth_key"]))
+                )
+                
                 self.riva_client = SpeechSynthesisClient(
                     riva_config["server_url"],
-                    auth=auth
+                    auth=auth,
+                    channel=channel
                 )
                 
+                # Keep one output stream open so synthesized chunks can be
+                # played as soon as they arrive
+                self._out_stream = sd.RawOutputStream(samplerate=RIVA_SAMPLE_RATE, channels=1, dtype='int16')
+                self._out_stream.start()
+                
+                # LRU cache of synthesized PCM keyed by (text, voice, rate)
+                self._audio_cache = OrderedDict()
+                self._audio_cache_size = self.speech_config.get("cache_size", 256)
+                
+                if self.speech_config.get("warmup", True):
+                    threading.Thread(target=self._warmup_riva, daemon=True).start()
+                    
                 self.logger.info("NVIDIA Riva TTS engine initialized successfully")
                 return
                 
             except ImportError:
                 self.logger.warning("NVIDIA Riva modules not installed. Falling back to pyttsx3.")
             except Exception as e:
-                self.logger.error(f"Error initializing Riva: {e}")
+                self.logger.error("Error initializing Riva: %s", e)
                 
         except ImportError:
             self.logger.warning("gRPC not installed. Cannot use NVIDIA Riva.")
@@ -133,69 +254,81 @@ class TextToSpeech:
         self.engine_type = "pyttsx3"
         self._init_pyttsx3()
         
-    def speak(self, text):
+    def _warmup_riva(self):
+        """Synthesize and discard a short phrase to prime the gRPC channel and server."""
+        try:
+            for _ in self.riva_client.synthesize_online(
+                text="hi",
+                language_code=RIVA_LANGUAGE_CODE,
+                voice_name=RIVA_VOICE_NAME,
+                sample_rate_hz=RIVA_SAMPLE_RATE
+            ):
+                pass
+        except Exception as e:
+            self.logger.warning("Riva warmup failed: %s", e)
+            
+    def speak(self, text, wait=False):
         """
         Convert text to speech.
         
+        With pyttsx3 the text is queued and this returns immediately unless
+        wait is True.
+        
         Args:
             text: The text to speak
+            wait: Block until the text has been spoken
         """
         if not text:
             self.logger.warning("Empty text provided to TTS engine")
             return
             
-        self.logger.info(f"Speaking: {text}")
+        self.logger.info("Speaking: %s", text)
         
         if self.engine_type == "pyttsx3":
-            self._speak_pyttsx3(text)
+            self._speak_pyttsx3(text, wait)
         elif self.engine_type == "riva":
             self._speak_riva(text)
             
-    def _speak_pyttsx3(self, text):
-        """Use pyttsx3 to speak the text."""
-        try:
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as e:
-            self.logger.error(f"Error in pyttsx3 TTS: {e}")
+    def _speak_pyttsx3(self, text, wait=False):
+        """Queue text for the pyttsx3 worker thread."""
+        done = threading.Event() if wait else None
+        self._tts_queue.put((text, done))
+        
+        if done is not None:
+            done.wait()
             
     def _speak_riva(self, text):
         """Use NVIDIA Riva to speak the text."""
         try:
-            # Synthesize speech using Riva
-            resp = self.riva_client.synthesize(
+            key = (text, RIVA_VOICE_NAME, RIVA_SAMPLE_RATE)
+            
+            # Replay cached audio for phrases that were already synthesized
+            pcm = self._audio_cache.get(key)
+            if pcm is not None:
+                self._audio_cache.move_to_end(key)
+                self._out_stream.write(pcm)
+                return
+            
+            # Stream synthesized audio straight to the output device
+            responses = self.riva_client.synthesize_online(
                 text=text,
-                language_code="en-US",
-                voice_name="English-US-Female-1",
-                sample_rate_hz=44100
+                language_code=RIVA_LANGUAGE_CODE,
+                voice_name=RIVA_VOICE_NAME,
+                sample_rate_hz=RIVA_SAMPLE_RATE
             )
             
-            # Save to a temporary file and play it
-            import tempfile
-            import soundfile as sf
-            import sounddevice as sd
-            
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_filename = temp_file.name
+            chunks = []
+            for resp in responses:
+                self._out_stream.write(resp.audio)
+                chunks.append(resp.audio)
                 
-            # Save the audio to the temp file
-            audio_samples = resp.audio
-            sf.write(temp_filename, audio_samples, 44100)
-            
-            # Play the audio
-            data, fs = sf.read(temp_filename)
-            sd.play(data, fs)
-            sd.wait()
-            
-            # Clean up
-            try:
-                os.unlink(temp_filename)
-            except:
-                pass
+            if self._audio_cache_size > 0:
+                self._audio_cache[key] = b"".join(chunks)
+                if len(self._audio_cache) > self._audio_cache_size:
+                    self._audio_cache.popitem(last=False)
                 
         except Exception as e:
-            self.logger.error(f"Error in Riva TTS: {e}")
+            self.logger.error("Error in Riva TTS: %s", e)
             
             # Fallback to pyttsx3 if Riva fails
             if hasattr(self, 'engine'):
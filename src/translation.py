@@ -1,32 +1,97 @@
+import asyncio
+import functools
 import logging
-from langdetect import detect
-from googletrans import Translator as GoogleTranslator
+import re
+import sys
+from types import MappingProxyType
 from .utils import setup_logging
 
-# Language mapping dictionary
-LANGUAGE_MAPPING = {
-    'afrikaans': 'af', 'albanian': 'sq', 'amharic': 'am', 'arabic': 'ar', 'armenian': 'hy', 'azerbaijani': 'az',
-    'basque': 'eu', 'belarusian': 'be', 'bengali': 'bn', 'bosnian': 'bs', 'bulgarian': 'bg', 'catalan': 'ca',
-    'cebuano': 'ceb', 'chichewa': 'ny', 'chinese (simplified)': 'zh-cn', 'chinese (traditional)': 'zh-tw',
-    'corsican': 'co', 'croatian': 'hr', 'czech': 'cs', 'danish': 'da', 'dutch': 'nl', 'english': 'en',
-    'esperanto': 'eo', 'estonian': 'et', 'filipino': 'tl', 'finnish': 'fi', 'french': 'fr', 'frisian': 'fy',
-    'galician': 'gl', 'georgian': 'ka', 'german': 'de', 'greek': 'el', 'gujarati': 'gu', 'haitian creole': 'ht',
-    'hausa': 'ha', 'hawaiian': 'haw', 'hebrew': 'he', 'hindi': 'hi', 'hmong': 'hmn', 'hungarian': 'hu',
-    'icelandic': 'is', 'igbo': 'ig', 'indonesian': 'id', 'irish': 'ga', 'italian': 'it', 'japanese': 'ja',
-    'javanese': 'jw', 'kannada': 'kn', 'kazakh': 'kk', 'khmer': 'km', 'korean': 'ko', 'kurdish (kurmanji)': 'ku',
-    'kyrgyz': 'ky', 'lao': 'lo', 'latin': 'la', 'latvian': 'lv', 'lithuanian': 'lt', 'luxembourgish': 'lb',
-    'macedonian': 'mk', 'malagasy': 'mg', 'malay': 'ms', 'malayalam': 'ml', 'maltese': 'mt', 'maori': 'mi',
-    'marathi': 'mr', 'mongolian': 'mn', 'myanmar (burmese)': 'my', 'nepali': 'ne', 'norwegian': 'no',
-    'odia': 'or', 'pashto': 'ps', 'persian': 'fa', 'polish': 'pl', 'portuguese': 'pt', 'punjabi': 'pa',
-    'romanian': 'ro', 'russian': 'ru', 'samoan': 'sm', 'scots gaelic': 'gd', 'serbian': 'sr', 'sesotho': 'st',
-    'shona': 'sn', 'sindhi': 'sd', 'sinhala': 'si', 'slovak': 'sk', 'slovenian': 'sl', 'somali': 'so',
-    'spanish': 'es', 'sundanese': 'su', 'swahili': 'sw', 'swedish': 'sv', 'tajik': 'tg', 'tamil': 'ta',
-    'telugu': 'te', 'thai': 'th', 'turkish': 'tr', 'ukrainian': 'uk', 'urdu': 'ur', 'uyghur': 'ug', 'uzbek': 'uz',
-    'vietnamese': 'vi', 'welsh': 'cy', 'xhosa': 'xh', 'yiddish': 'yi', 'yoruba': 'yo', 'zulu': 'zu'
-}
+# Shared Google Translate client, created on first use so that importing
+# this module does not pull in googletrans and its HTTP stack
+_GOOGLE_SINGLETON = None
+
+def _get_google():
+    """Return the shared Google Translate client, creating it if needed."""
+    global _GOOGLE_SINGLETON
+    if _GOOGLE_SINGLETON is None:
+        from googletrans import Translator as GoogleTranslator
+        _GOOGLE_SINGLETON = GoogleTranslator()
+    return _GOOGLE_SINGLETON
+
+# Fast path for language detection: pure ASCII text containing a common
+# English word is treated as English without running langdetect. Only words
+# that are not also common in other Latin-script languages are used (e.g.
+# "is" is Dutch, "to" Polish, "are" Romanian).
+_ASCII_RE = re.compile(r'^[\x00-\x7f]+$')
+_EN_STOP_RE = re.compile(r'\b(the|and|you|what)\b', re.IGNORECASE)
+
+def _has_words(text):
+    """
+    Check whether text has anything worth detecting or translating.
+    
+    Empty strings, single characters, numbers and punctuation are left as-is.
+    
+    Args:
+        text: Text to check
+        
+    Returns:
+        bool: True if the text is at least two characters and contains a letter
+    """
+    stripped = text.strip()
+    return len(stripped) >= 2 and any(c.isalpha() for c in stripped)
+
+@functools.lru_cache(maxsize=1024)
+def _detect_cached(text):
+    """Run langdetect, memoizing results for repeated phrases."""
+    from langdetect import detect
+    return detect(text)
+
+@functools.lru_cache(maxsize=1024)
+def _translate_cached(text, source_lang, target_lang):
+    """Translate a single string, memoizing results for repeated phrases."""
+    return _get_google().translate(text, src=source_lang, dest=target_lang).text
+
+# Supported languages as (name, code) pairs
+_LANGS = (
+    ('afrikaans', 'af'), ('albanian', 'sq'), ('amharic', 'am'), ('arabic', 'ar'), ('armenian', 'hy'),
+    ('azerbaijani', 'az'), ('basque', 'eu'), ('belarusian', 'be'), ('bengali', 'bn'), ('bosnian', 'bs'),
+    ('bulgarian', 'bg'), ('catalan', 'ca'), ('cebuano', 'ceb'), ('chichewa', 'ny'),
+    ('chinese (simplified)', 'zh-cn'), ('chinese (traditional)', 'zh-tw'), ('corsican', 'co'),
+    ('croatian', 'hr'), ('czech', 'cs'), ('danish', 'da'), ('dutch', 'nl'), ('english', 'en'),
+    ('esperanto', 'eo'), ('estonian', 'et'), ('filipino', 'tl'), ('finnish', 'fi'), ('french', 'fr'),
+    ('frisian', 'fy'), ('galician', 'gl'), ('georgian', 'ka'), ('german', 'de'), ('greek', 'el'),
+    ('gujarati', 'gu'), ('haitian creole', 'ht'), ('hausa', 'ha'), ('hawaiian', 'haw'), ('hebrew', 'he'),
+    ('hindi', 'hi'), ('hmong', 'hmn'), ('hungarian', 'hu'), ('icelandic', 'is'), ('igbo', 'ig'),
+    ('indonesian', 'id'), ('irish', 'ga'), ('italian', 'it'), ('japanese', 'ja'), ('javanese', 'jw'),
+    ('kannada', 'kn'), ('kazakh', 'kk'), ('khmer', 'km'), ('korean', 'ko'), ('kurdish (kurmanji)', 'ku'),
+    ('kyrgyz', 'ky'), ('lao', 'lo'), ('latin', 'la'), ('latvian', 'lv'), ('lithuanian', 'lt'),
+    ('luxembourgish', 'lb'), ('macedonian', 'mk'), ('malagasy', 'mg'), ('malay', 'ms'), ('malayalam', 'ml'),
+    ('maltese', 'mt'), ('maori', 'mi'), ('marathi', 'mr'), ('mongolian', 'mn'), ('myanmar (burmese)', 'my'),
+    ('nepali', 'ne'), ('norwegian', 'no'), ('odia', 'or'), ('pashto', 'ps'), ('persian', 'fa'),
+    ('polish', 'pl'), ('portuguese', 'pt'), ('punjabi', 'pa'), ('romanian', 'ro'), ('russian', 'ru'),
+    ('samoan', 'sm'), ('scots gaelic', 'gd'), ('serbian', 'sr'), ('sesotho', 'st'), ('shona', 'sn'),
+    ('sindhi', 'sd'), ('sinhala', 'si'), ('slovak', 'sk'), ('slovenian', 'sl'), ('somali', 'so'),
+    ('spanish', 'es'), ('sundanese', 'su'), ('swahili', 'sw'), ('swedish', 'sv'), ('tajik', 'tg'),
+    ('tamil', 'ta'), ('telugu', 'te'), ('thai', 'th'), ('turkish', 'tr'), ('ukrainian', 'uk'), ('urdu', 'ur'),
+    ('uyghur', 'ug'), ('uzbek', 'uz'), ('vietnamese', 'vi'), ('welsh', 'cy'), ('xhosa', 'xh'),
+    ('yiddish', 'yi'), ('yoruba', 'yo'), ('zulu', 'zu')
+)
+
+# Language mapping dictionary, frozen into a read-only view with interned strings
+LANGUAGE_MAPPING = MappingProxyType({sys.intern(lang): sys.intern(code) for lang, code in _LANGS})
 
 # Reverse mapping
-CODE_TO_LANGUAGE = {code: lang for lang, code in LANGUAGE_MAPPING.items()}
+CODE_TO_LANGUAGE = MappingProxyType({code: lang for lang, code in LANGUAGE_MAPPING.items()})
+
+@functools.lru_cache(maxsize=256)
+def _lookup_language_code(language_name):
+    """Look up a language code by name, case-insensitively."""
+    return LANGUAGE_MAPPING.get(language_name.lower(), language_name)
+
+@functools.lru_cache(maxsize=256)
+def _lookup_language_name(language_code):
+    """Look up a language name by code."""
+    return CODE_TO_LANGUAGE.get(language_code, language_code)
 
 class Translator:
     """
@@ -42,7 +107,6 @@ class Translator:
             config: Optional configuration dictionary
         """
         self.default_language = default_language
-        self.translator = GoogleTranslator()
         
         # Setup logging
         if config and config.get("logging", {}).get("enabled", False):
@@ -52,7 +116,7 @@ class Translator:
             self.logger = logging.getLogger(__name__)
             self.logger.setLevel(logging.INFO)
             
-        self.logger.info(f"Translator initialized with default language: {default_language}")
+        self.logger.info("Translator initialized with default language: %s", default_language)
         
     def detect_language(self, text):
         """
@@ -64,12 +128,29 @@ class Translator:
         Returns:
             str: Detected language code
         """
+        if not _has_words(text):
+            return self.default_language
+            
+        if _ASCII_RE.match(text) and _EN_STOP_RE.search(text):
+            return "en"
+            
         try:
-            detected = detect(text)
-            self.logger.debug(f"Detected language: {detected} for text: {text[:30]}...")
+            from langdetect import LangDetectException
+        except ImportError as e:
+            self.logger.error("Error detecting language: %s", e)
+            return self.default_language
+            
+        try:
+            # The first 128 characters are enough to identify the language
+            detected = _detect_cached(text[:128])
+            self.logger.debug("Detected language: %s for text: %.30s...", detected, text)
             return detected
+        except LangDetectException as e:
+            # Expected for short or feature-less input such as "ok" or "42"
+            self.logger.debug("Could not detect language, using default: %s", e)
+            return self.default_language
         except Exception as e:
-            self.logger.error(f"Error detecting language: {e}")
+            self.logger.error("Error detecting language: %s", e)
             return self.default_language
             
     def translate(self, text, source_lang=None, target_lang="en"):
@@ -87,6 +168,10 @@ class Translator:
         if not text:
             return ""
             
+        # Nothing to translate in numbers, punctuation or single characters
+        if not _has_words(text):
+            return text
+            
         try:
             # Auto-detect source language if not provided
             if source_lang is None:
@@ -97,20 +182,66 @@ class Translator:
                 return text
                 
             # Perform translation
-            translation = self.translator.translate(
-                text,
-                src=source_lang,
-                dest=target_lang
-            )
+            translated = _translate_cached(text, source_lang, target_lang)
             
-            self.logger.debug(f"Translated from {source_lang} to {target_lang}: {text[:30]}... -> {translation.text[:30]}...")
+            self.logger.debug("Translated from %s to %s: %.30s... -> %.30s...", source_lang, target_lang, text, translated)
             
-            return translation.text
+            return translated
             
         except Exception as e:
-            self.logger.error(f"Translation error: {e}")
+            self.logger.error("Translation error: %s", e)
             return text  # Return original text on error
             
+    def translate_batch(self, texts, source_lang=None, target_lang="en"):
+        """
+        Translate several texts, reusing cached results for repeated phrases.
+        
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code (auto-detect per text if None)
+            target_lang: Target language code
+            
+        Returns:
+            list: Translated texts, in the same order as the input
+        """
+        results = [text or "" for text in texts]
+        translated = 0
+        
+        for i, text in enumerate(texts):
+            if not text or not _has_words(text):
+                continue
+            try:
+                source = source_lang or self.detect_language(text)
+                if source != target_lang:
+                    results[i] = _translate_cached(text, source, target_lang)
+                    translated += 1
+            except Exception as e:
+                # Texts that fail to translate are returned unchanged
+                self.logger.error("Batch translation error: %s", e)
+                
+        self.logger.debug("Batch translated %d texts to %s", translated, target_lang)
+        
+        return results
+        
+    async def atranslate(self, text, source_lang=None, target_lang="en"):
+        """
+        Translate text without blocking the event loop.
+        
+        Concurrent calls can be combined with asyncio.gather().
+        
+        Args:
+            text: Text to translate
+            source_lang: Source language code (auto-detect if None)
+            target_lang: Target language code
+            
+        Returns:
+            str: Translated text
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.translate, text, source_lang, target_lang)
+        )
+            
     def translate_to_english(self, text):
         """
         Translate text to English and detect source language.
@@ -163,7 +294,7 @@ class Translator:
         Returns:
             str: Language code (e.g., 'en')
         """
-        return LANGUAGE_MAPPING.get(language_name.lower(), language_name)
+        return _lookup_language_code(language_name)
         
     def get_language_name(self, language_code):
         """
@@ -175,4 +306,4 @@ class Translator:
         Returns:
             str: Language name (e.g., 'english')
         """
-        return CODE_TO_LANGUAGE.get(language_code, language_code)
\ No newline at end of file
+        return _lookup_language_name(language_code)
\ No newline at end of file
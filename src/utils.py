@@ -1,6 +1,17 @@
 import os
+import functools
 import logging
-from datetime import datetime
+import re
+import time
+from logging.handlers import RotatingFileHandler
+
+# Runs of whitespace, collapsed to a single space by clean_text
+_WS_RE = re.compile(r'\s+')
+
+# Shared logger used by all modules; setup_logging only builds its
+# handlers once per log file
+_LOGGER_NAME = "jarvis"
+_CONFIGURED_FILES = set()
 
 def setup_logging(level_name="INFO", log_file=None):
     """
@@ -13,6 +24,11 @@ def setup_logging(level_name="INFO", log_file=None):
     Returns:
         logger: Configured logger object
     """
+    # Reuse the existing handlers if this log file is already set up
+    logger = logging.getLogger(_LOGGER_NAME)
+    if log_file in _CONFIGURED_FILES:
+        return logger
+        
     # Map string level to logging level
     level_map = {
         "DEBUG": logging.DEBUG,
@@ -24,13 +40,14 @@ def setup_logging(level_name="INFO", log_file=None):
     
     level = level_map.get(level_name.upper(), logging.INFO)
     
-    # Create logger
-    logger = logging.getLogger(__name__)
+    # Configure logger
     logger.setLevel(level)
     
     # Remove existing handlers
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        handler.close()
+    _CONFIGURED_FILES.clear()
     
     # Create formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -45,29 +62,72 @@ def setup_logging(level_name="INFO", log_file=None):
     if log_file:
         # Create logs directory if it doesn't exist
         log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
             
-        # Create file handler
-        file_handler = logging.FileHandler(log_file)
+        # Create file handler; the file is not opened until the first write
+        file_handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024,
+                                           backupCount=3, delay=True)
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
+        
+    _CONFIGURED_FILES.add(log_file)
     
     return logger
     
+class WakeWordMatcher:
+    """
+    Matches any of a fixed set of wake words in a transcript.
+    
+    Build it once at startup and pass it to extract_wake_word. Several
+    wake words are combined into one compiled regex, so each check is a
+    single scan of the text regardless of how many words there are.
+    """
+    def __init__(self, words):
+        """
+        Args:
+            words: A wake word or a list of wake words
+        """
+        if isinstance(words, str):
+            words = [words]
+            
+        self._folded = tuple(word.casefold() for word in words if word)
+        
+        self._pattern = None
+        if len(self._folded) > 1:
+            self._pattern = re.compile("|".join(re.escape(word) for word in self._folded))
+            
+    def matches(self, text):
+        """Return True if any wake word occurs in the text."""
+        if not self._folded:
+            return False
+            
+        text_cf = text.casefold()
+        if self._pattern is not None:
+            return self._pattern.search(text_cf) is not None
+            
+        return self._folded[0] in text_cf
+        
+@functools.lru_cache(maxsize=32)
+def _casefold(word):
+    return word.casefold()
+    
 def extract_wake_word(text, wake_word):
     """
     Check if the wake word is in the text.
     
     Args:
         text: Input text
-        wake_word: Wake word to check for
+        wake_word: Wake word to check for, or a WakeWordMatcher
         
     Returns:
         bool: True if wake word is in the text, False otherwise
     """
-    return wake_word.lower() in text.lower()
+    if isinstance(wake_word, WakeWordMatcher):
+        return wake_word.matches(text)
+        
+    return _casefold(wake_word) in text.casefold()
     
 def get_timestamp():
     """
@@ -76,7 +136,7 @@ def get_timestamp():
     Returns:
         str: Current timestamp in format YYYY-MM-DD_HH-MM-SS
     """
-    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return time.strftime("%Y-%m-%d_%H-%M-%S")
     
 def clean_text(text):
     """
@@ -91,10 +151,13 @@ def clean_text(text):
     if not text:
         return ""
         
+    # Fast path: short text whose only whitespace is single ASCII spaces
+    # (isprintable() is False for tabs, newlines and Unicode spaces)
+    if len(text) < 64 and "  " not in text and text.isprintable():
+        return text.strip()
+        
     # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text.strip()
+    return _WS_RE.sub(' ', text).strip()
     
 def save_conversation(conversation_history, filename=None):
     """
@@ -113,13 +176,14 @@ def save_conversation(conversation_history, filename=None):
         
     # Create logs directory if it doesn't exist
     log_dir = os.path.dirname(filename)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
         
     # Write conversation to file
-    with open(filename, 'w', encoding='utf-8') as f:
-        for i, message in enumerate(conversation_history):
-            role = "User" if i % 2 == 0 else "Bot"
-            f.write(f"{role}: {message}\n")
+    lines = ("{}: {}\n".format("User" if i % 2 == 0 else "Bot", message)
+             for i, message in enumerate(conversation_history))
+    
+    with open(filename, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        f.writelines(lines)
             
     return filename
\ No newline at end of file